@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 import urllib.request
 import urllib.parse
-import re
 import json
+import os
+import random
+import threading
+import time
 from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "https://aborovikov.com"
 
@@ -17,6 +21,11 @@ PAGES_TO_TEST = [
     "https://aborovikov.com/musician-ru/",
 ]
 
+# Number of pages audited at once
+PAGE_CONCURRENCY = 3
+# Number of image/link checks in flight at once, across all pages
+RESOURCE_CONCURRENCY = int(os.environ.get('AUDIT_CONCURRENCY', 16))
+
 class LivePageParser(HTMLParser):
     def __init__(self):
         super().__init__()
@@ -31,30 +40,49 @@ class LivePageParser(HTMLParser):
         self.images = []
 
     def handle_starttag(self, tag, attrs):
-        attrs_dict = dict(attrs)
-        if tag == 'title':
-            self.in_title = True
-        elif tag == 'meta':
-            name = attrs_dict.get('name', '').lower()
-            if name == 'description':
-                self.meta_desc = attrs_dict.get('content', '')
-        elif tag == 'link':
-            rel = attrs_dict.get('rel', '').lower()
-            if rel == 'canonical':
-                self.canonical = attrs_dict.get('href', '')
-        elif tag == 'a':
-            href = attrs_dict.get('href')
-            if href:
-                self.links.append(href)
-        elif tag == 'img':
-            src = attrs_dict.get('src')
-            if src:
-                self.images.append(src)
-        elif tag == 'script':
-            stype = attrs_dict.get('type', '').lower()
-            if stype == 'application/ld+json':
-                self.in_schema = True
-                self.schema_buf = ""
+        # Single dict dispatch per tag; untracked tags return before their
+        # attributes are even turned into a dict.
+        handler = self.START_TAG_HANDLERS.get(tag)
+        if handler is not None:
+            handler(self, dict(attrs))
+
+    def _start_title(self, attrs_dict):
+        self.in_title = True
+
+    def _start_meta(self, attrs_dict):
+        name = attrs_dict.get('name', '').lower()
+        if name == 'description':
+            self.meta_desc = attrs_dict.get('content', '')
+
+    def _start_link(self, attrs_dict):
+        rel = attrs_dict.get('rel', '').lower()
+        if rel == 'canonical':
+            self.canonical = attrs_dict.get('href', '')
+
+    def _start_a(self, attrs_dict):
+        href = attrs_dict.get('href')
+        if href:
+            self.links.append(href)
+
+    def _start_img(self, attrs_dict):
+        src = attrs_dict.get('src')
+        if src:
+            self.images.append(src)
+
+    def _start_script(self, attrs_dict):
+        stype = attrs_dict.get('type', '').lower()
+        if stype == 'application/ld+json':
+            self.in_schema = True
+            self.schema_buf = ""
+
+    START_TAG_HANDLERS = {
+        'title': _start_title,
+        'meta': _start_meta,
+        'link': _start_link,
+        'a': _start_a,
+        'img': _start_img,
+        'script': _start_script,
+    }
 
     def handle_endtag(self, tag):
         if tag == 'title':
@@ -75,99 +103,234 @@ headers = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
+# One opener shared by every request (and every worker thread) so the
+# headers and handler chain are built once instead of per request.
+opener = urllib.request.build_opener()
+opener.addheaders = list(headers.items())
+
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+MAX_ATTEMPTS = 3
+# Longest single wait (seconds) between attempts, whether computed or from Retry-After
+MAX_RETRY_DELAY = 30
+# Per-socket-operation timeout (seconds) so a stalled connection can't hold a
+# worker slot indefinitely
+REQUEST_TIMEOUT = 30
+
+def open_with_retry(req):
+    """Open req through the shared opener, backing off on throttling and gateway errors."""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return opener.open(req, timeout=REQUEST_TIMEOUT)
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRYABLE_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                raise
+            retry_after = e.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = int(retry_after)
+                # Don't park a worker for however long the server asks; give up instead
+                if delay > MAX_RETRY_DELAY:
+                    raise
+            else:
+                # Exponential backoff with jitter so parallel checks don't retry in lockstep
+                delay = min(MAX_RETRY_DELAY, (2 ** attempt) * 0.5) * (0.5 + random.random())
+            e.close()
+            time.sleep(delay)
+
 # 1. Sitemap & Robots.txt Check
 for asset_path in ['/robots.txt', '/sitemap.xml']:
     url = BASE_URL + asset_path
-    req = urllib.request.Request(url, headers=headers)
+    req = urllib.request.Request(url)
     try:
-        with urllib.request.urlopen(req) as res:
+        with open_with_retry(req) as res:
             print(f"\n[OK] {url} -> HTTP {res.status} ({len(res.read())} bytes)")
     except Exception as e:
         print(f"\n[ERROR] {url} -> {e}")
 
 # 2. Audit Each Live Page
-broken_links_found = []
-large_images_found = []
-schema_errors_found = []
+# Image and link checks from every page share this pool, which caps the number
+# of requests in flight against the site at once.
+resource_pool = ThreadPoolExecutor(max_workers=RESOURCE_CONCURRENCY)
+
+# Hosts that answered HEAD with 405/501; their images go straight to GET
+head_unsupported_hosts = set()
+
+def image_size(abs_img_url):
+    """Return the image size in bytes, preferring HEAD and falling back to a range GET."""
+    host = urllib.parse.urlparse(abs_img_url).netloc
+    if host not in head_unsupported_hosts:
+        img_req = urllib.request.Request(abs_img_url, method='HEAD')
+        try:
+            with open_with_retry(img_req) as img_res:
+                return int(img_res.headers.get('Content-Length', 0))
+        except urllib.error.HTTPError as e:
+            if e.code in (405, 501):
+                head_unsupported_hosts.add(host)
+        except Exception as e:
+            pass
+    # Retry with GET if HEAD fails. Ask for a single byte; the full size comes
+    # back in Content-Range
+    g_req = urllib.request.Request(abs_img_url, headers={'Range': 'bytes=0-0'})
+    try:
+        with open_with_retry(g_req) as g_res:
+            if g_res.status != 206:
+                # Range ignored: the full body is coming anyway
+                return count_body(g_res)
+            total = g_res.headers.get('Content-Range', '').rpartition('/')[2]
+            if total.isdigit():
+                return int(total)
+    except urllib.error.HTTPError as e:
+        if e.code == 416:
+            # No byte 0 to return: the resource is empty
+            e.close()
+            return 0
+        raise
+    # Partial response with an unknown total ("bytes 0-0/*"): fetch the whole body
+    with open_with_retry(urllib.request.Request(abs_img_url)) as g_res:
+        return count_body(g_res)
+
+def count_body(res):
+    """Count the response body in chunks rather than holding the whole image in memory."""
+    content_length = 0
+    while chunk := res.read(64 * 1024):
+        content_length += len(chunk)
+    return content_length
 
-for page_url in PAGES_TO_TEST:
-    print(f"\n--------------------------------------------------")
-    print(f"Auditing Live Page: {page_url}")
-    print(f"--------------------------------------------------")
-    req = urllib.request.Request(page_url, headers=headers)
+def check_image(abs_img_url):
+    out = []
+    large_images = []
     try:
-        with urllib.request.urlopen(req) as res:
+        size_kb = image_size(abs_img_url) / 1024
+    except Exception as get_err:
+        out.append(f"    [ERROR] Image failed to load: {abs_img_url} ({get_err})")
+        return out, large_images
+    if size_kb > 500:
+        out.append(f"    [WARN] Image too large: {abs_img_url} ({size_kb:.1f} KB)")
+        large_images.append((abs_img_url, size_kb))
+    return out, large_images
+
+def link_status(abs_link_url):
+    """Return the HTTP error status for a broken link, or None if it resolves."""
+    link_req = urllib.request.Request(abs_link_url, method='HEAD')
+    try:
+        with open_with_retry(link_req) as l_res:
+            if l_res.status >= 400:
+                return l_res.status
+    except urllib.error.HTTPError as he:
+        return he.code
+    except Exception as l_err:
+        pass
+    return None
+
+# Pages share most of their nav links and many assets, so every check is run
+# once per URL for the whole audit and later pages reuse the same future.
+shared_checks = {}
+shared_checks_lock = threading.Lock()
+
+def submit_check(check, url):
+    with shared_checks_lock:
+        future = shared_checks.get((check, url))
+        if future is None:
+            future = shared_checks[(check, url)] = resource_pool.submit(check, url)
+    return future
+
+def canonical_url(base_url, ref):
+    """Resolve ref against base_url, dropping the fragment and normalising host and empty path."""
+    abs_url = urllib.parse.urljoin(base_url, ref)
+    parts = urllib.parse.urlsplit(abs_url)
+    # Only web URLs have fragments to drop; a '#' inside a data: URI is content
+    if parts.scheme.lower() not in ('http', 'https'):
+        return abs_url
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+def audit_page(page_url):
+    """Audit one page; returns its report lines and findings so pages can run concurrently."""
+    out = []
+    broken_links = []
+    large_images = []
+    schema_errors = []
+
+    out.append(f"\n--------------------------------------------------")
+    out.append(f"Auditing Live Page: {page_url}")
+    out.append(f"--------------------------------------------------")
+    req = urllib.request.Request(page_url)
+    try:
+        with open_with_retry(req) as res:
             status = res.status
             html_content = res.read().decode('utf-8', errors='ignore')
-            print(f"Status: HTTP {status} | Size: {len(html_content)} bytes")
+            out.append(f"Status: HTTP {status} | Size: {len(html_content)} bytes")
     except Exception as e:
-        print(f"HTTP ERROR accessing {page_url}: {e}")
-        continue
+        out.append(f"HTTP ERROR accessing {page_url}: {e}")
+        return out, broken_links, large_images, schema_errors
 
     parser = LivePageParser()
     parser.feed(html_content)
     
     title = parser.title.strip()
-    print(f"  Title ({len(title)} chars): {title}")
+    out.append(f"  Title ({len(title)} chars): {title}")
     
     desc = parser.meta_desc.strip()
     desc_status = "OK" if len(desc) <= 160 else "TOO LONG (>160)"
-    print(f"  Meta Description ({len(desc)} chars - {desc_status}): {desc}")
+    out.append(f"  Meta Description ({len(desc)} chars - {desc_status}): {desc}")
     
-    print(f"  Canonical Tag: {parser.canonical}")
+    out.append(f"  Canonical Tag: {parser.canonical}")
     
     # Check Schemas
-    print(f"  JSON-LD Schemas ({len(parser.schemas)}):")
+    out.append(f"  JSON-LD Schemas ({len(parser.schemas)}):")
     for i, s_str in enumerate(parser.schemas):
         try:
             s_json = json.loads(s_str)
-            print(f"    Schema #{i+1}: Valid JSON | @type={s_json.get('@type', 'Graph/Multiple')}")
+            out.append(f"    Schema #{i+1}: Valid JSON | @type={s_json.get('@type', 'Graph/Multiple')}")
         except Exception as err:
-            print(f"    Schema #{i+1}: INVALID JSON ({err})")
-            schema_errors_found.append((page_url, str(err)))
+            out.append(f"    Schema #{i+1}: INVALID JSON ({err})")
+            schema_errors.append((page_url, str(err)))
 
-    # Check Page Images
-    for img_src in parser.images:
-        abs_img_url = urllib.parse.urljoin(page_url, img_src)
-        img_req = urllib.request.Request(abs_img_url, headers=headers, method='HEAD')
-        try:
-            with urllib.request.urlopen(img_req) as img_res:
-                content_length = int(img_res.headers.get('Content-Length', 0))
-                size_kb = content_length / 1024
-                if size_kb > 500:
-                    print(f"    [WARN] Image too large: {abs_img_url} ({size_kb:.1f} KB)")
-                    large_images_found.append((abs_img_url, size_kb))
-        except Exception as e:
-            # Retry with GET if HEAD fails
-            try:
-                g_req = urllib.request.Request(abs_img_url, headers=headers)
-                with urllib.request.urlopen(g_req) as g_res:
-                    content_length = len(g_res.read())
-                    size_kb = content_length / 1024
-                    if size_kb > 500:
-                        print(f"    [WARN] Image too large: {abs_img_url} ({size_kb:.1f} KB)")
-                        large_images_found.append((abs_img_url, size_kb))
-            except Exception as get_err:
-                print(f"    [ERROR] Image failed to load: {abs_img_url} ({get_err})")
-
-    # Check Internal Links
-    for link_href in parser.links:
+    # Check images and internal links on the shared, bounded resource pool.
+    # Pages repeat nav links and images, so each distinct one is checked once.
+    image_checks = []
+    for img_src in dict.fromkeys(parser.images):
+        abs_img_url = canonical_url(page_url, img_src)
+        image_checks.append(submit_check(check_image, abs_img_url))
+
+    link_checks = []
+    for link_href in dict.fromkeys(parser.links):
         if link_href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
             continue
-        abs_link_url = urllib.parse.urljoin(page_url, link_href)
+        abs_link_url = canonical_url(page_url, link_href)
         # Only test links on domain aborovikov.com
         if 'aborovikov.com' in urllib.parse.urlparse(abs_link_url).netloc:
-            link_req = urllib.request.Request(abs_link_url, headers=headers, method='HEAD')
-            try:
-                with urllib.request.urlopen(link_req) as l_res:
-                    if l_res.status >= 400:
-                        print(f"    [BROKEN LINK] {link_href} -> HTTP {l_res.status}")
-                        broken_links_found.append((page_url, link_href, l_res.status))
-            except urllib.error.HTTPError as he:
-                print(f"    [BROKEN LINK] {link_href} on [{page_url}] -> HTTP {he.code}")
-                broken_links_found.append((page_url, link_href, he.code))
-            except Exception as l_err:
-                pass
+            link_checks.append((link_href, submit_check(link_status, abs_link_url)))
+
+    for check in image_checks:
+        check_out, findings = check.result()
+        out.extend(check_out)
+        large_images.extend(findings)
+    for link_href, check in link_checks:
+        status = check.result()
+        if status is not None:
+            out.append(f"    [BROKEN LINK] {link_href} on [{page_url}] -> HTTP {status}")
+            broken_links.append((page_url, link_href, status))
+
+    return out, broken_links, large_images, schema_errors
+
+broken_links_found = []
+large_images_found = []
+schema_errors_found = []
+
+# Pages are independent network I/O, so audit them side by side and print the
+# reports in the original order once each finishes.
+with ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY) as pool:
+    futures = [pool.submit(audit_page, page_url) for page_url in PAGES_TO_TEST]
+    for page_url, future in zip(PAGES_TO_TEST, futures):
+        try:
+            out, broken_links, large_images, schema_errors = future.result()
+        except Exception as e:
+            print(f"\n[ERROR] Audit failed for {page_url}: {e}")
+            continue
+        print("\n".join(out))
+        broken_links_found.extend(broken_links)
+        large_images_found.extend(large_images)
+        schema_errors_found.extend(schema_errors)
+resource_pool.shutdown()
 
 print("\n==================================================")
 print("AUDIT RESULTS SUMMARY")